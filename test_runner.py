@@ -1,25 +1,36 @@
-from typing import List, Union
+from __future__ import annotations
+from typing import List, Tuple
 from pathlib import Path
-from threading import Thread, Lock
-from queue import Queue
-from string import Template
+from threading import Thread, Lock, local
+from queue import SimpleQueue
 import diff_match_patch as dmp_module
 import subprocess
+import asyncio
+import atexit
+import sys
+import io
 import random
 import time
 import shlex
-import glob
 import re
 import os
 
 variables = {}
 use_colors = True
 brief_mode = False
-ran_tests_count = 0
-failed_tests = []
-RUNNER_LOCK = Lock()
-CMD_REGEX = re.compile(r'^;\s+(\w+)(.*)(\n([^;]*))?$', re.M)
-VAR_REGEX = re.compile(r'@{(\w+)}')
+# Same syntax as string.Template: $$, $name and ${name}.
+VAR_REGEX = re.compile(r'\$(?:(\$)|([_a-z][_a-z0-9]*)|{([_a-z][_a-z0-9]*)})', re.I | re.A)
+COLOR_RED = "\x1b[31m"
+COLOR_GREEN = "\x1b[32m"
+COLOR_RESET = "\x1b[0m"
+DIFF_COLORS = { -1: COLOR_RED, 0: "", 1: COLOR_GREEN }
+DIFF_TIMEOUT = 0.1 # seconds
+BUFFER_POOL_CAPACITY = 16
+_BUFFER_POOL = local()
+_LOG_QUEUE = SimpleQueue()
+_EXPECTED_POOL = {}
+_LOG_WRITER_LOCK = Lock()
+_log_writer = None
 
 def time_to_string(time_in_ns: int):
     if time_in_ns > 3_600_000_000_000: # about hours
@@ -31,115 +42,275 @@ def time_to_string(time_in_ns: int):
     else:
         return "{} ms".format(time_in_ns * 1e-6)
 
+def normalize_newlines(data: bytes) -> bytes:
+    # Same translation as reading in universal newlines (text) mode: '\r\n'
+    # and '\r' both become '\n'.
+    if b'\r' not in data:
+        return data
+    return data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+async def execute_command(args: List[str]) -> subprocess.CompletedProcess:
+    # Both pipes are read until EOF, so output from processes the test leaves
+    # behind is captured too. Outputs are kept as bytes, they are only
+    # decoded when a mismatch has to be reported.
+    process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    stdout, stderr = await process.communicate()
+    return subprocess.CompletedProcess(args, process.returncode, normalize_newlines(stdout), normalize_newlines(stderr))
+
+def _acquire_buffer() -> io.StringIO:
+    buffers = getattr(_BUFFER_POOL, 'buffers', None)
+    if buffers:
+        return buffers.pop()
+    return io.StringIO()
+
+def _release_buffer(buffer: io.StringIO):
+    buffers = getattr(_BUFFER_POOL, 'buffers', None)
+    if buffers is None:
+        buffers = []
+        _BUFFER_POOL.buffers = buffers
+    if len(buffers) < BUFFER_POOL_CAPACITY:
+        buffer.seek(0)
+        buffer.truncate(0)
+        buffers.append(buffer)
+
+class LogWriterThread(Thread):
+    def __init__(self, queue: SimpleQueue):
+        super().__init__(name="LogWriter", daemon=True)
+        self.queue = queue
+
+    def run(self) -> None:
+        while True:
+            # Coalesce everything queued since the last wakeup into one write.
+            chunks = [self.queue.get()]
+            while not self.queue.empty():
+                chunks.append(self.queue.get_nowait())
+
+            stop = None in chunks
+            sys.stdout.write("".join(chunk for chunk in chunks if chunk is not None))
+            sys.stdout.flush()
+            if stop:
+                return
+
+def _stop_log_writer():
+    _LOG_QUEUE.put(None)
+    _log_writer.join()
+
+def log(text: str):
+    global _log_writer
+    if _log_writer is None:
+        with _LOG_WRITER_LOCK:
+            if _log_writer is None:
+                _log_writer = LogWriterThread(_LOG_QUEUE)
+                _log_writer.start()
+                atexit.register(_stop_log_writer)
+    _LOG_QUEUE.put(text)
+
+def _expand_variable(match: re.Match) -> str:
+    if match.group(1) is not None:
+        return '$'
+    name = match.group(2) or match.group(3)
+    return variables.get(name, match.group(0))
+
 def expand_variables(template: str):
-    global variables
-    return Template(template).safe_substitute(variables)
+    # Behaves like Template(template).safe_substitute(variables) without
+    # building a Template for every expanded field.
+    return VAR_REGEX.sub(_expand_variable, template)
+
+def diff_outputs(expected: str, actual: str):
+    dmp = dmp_module.diff_match_patch()
+    # Past the timeout diff_main() returns a coarser diff, so a huge output
+    # cannot stall the runner.
+    dmp.Diff_Timeout = DIFF_TIMEOUT
+    diff = dmp.diff_main(expected, actual)
+    dmp.diff_cleanupSemantic(diff)
+    return diff
 
 class Output:
     def __init__(self) -> None:
-        self.buffer = ""
+        # Acquired lazily from the per-thread pool and given back on flush().
+        self.buffer = None
         global use_colors
         global brief_mode
         self.brief_mode = brief_mode
         self.use_colors = use_colors
     
-    def color(self, str):
+    def color(self, escape: str):
         if not self.use_colors:
             return
-        self.buffer += "\x1b[" + str + "m"
+        self.append(escape)
         
     def reset_color(self):
-        self.color("0")
+        self.color(COLOR_RESET)
         
     def append(self, text: str):
-        self.buffer += text
+        if self.buffer is None:
+            self.buffer = _acquire_buffer()
+        self.buffer.write(text)
         
     def begin_test_run(self, name: str):
         if self.brief_mode:
             return
         
-        self.color("32")
-        self.buffer += "[ RUN      ]"
+        self.color(COLOR_GREEN)
+        self.append("[ RUN      ]")
         self.reset_color()
-        self.buffer += " "
-        self.buffer += name
-        self.buffer += "\n"
+        self.append(" ")
+        self.append(name)
+        self.append("\n")
         
     def end_test_run(self, name: str, execution_time_in_ns: int, failed: bool):
         if failed:
-            self.color("31")
-            self.buffer += "[  FAILED  ]"
+            self.color(COLOR_RED)
+            self.append("[  FAILED  ]")
         elif not self.brief_mode:
-            self.color("32")
-            self.buffer += "[       OK ]"
+            self.color(COLOR_GREEN)
+            self.append("[       OK ]")
         else:
             return
         
         self.reset_color()
-        self.buffer += " "
-        self.buffer += name
-        self.buffer += " ("
-        self.buffer += time_to_string(execution_time_in_ns)
-        self.buffer += ")"
+        self.append(" ")
+        self.append(name)
+        self.append(" (")
+        self.append(time_to_string(execution_time_in_ns))
+        self.append(")")
     
     def end_test_run_exception(self, name: str, exception):
         self.append(str(exception))
         self.append("\n")
-        self.color("31")
+        self.color(COLOR_RED)
         self.append("[  FAILED  ]")
         self.reset_color()
         self.append(" exception occurred when running {}".format(name))
     
-    def _output_stdout_stderr_mismatch(self, stdout_or_stderr: str, expected: str, actual: str):
-        self.buffer += "Unexpected {} output from test.\n".format(stdout_or_stderr)
+    def _output_stdout_stderr_mismatch(self, stdout_or_stderr: str, expected: bytes, actual: bytes):
+        expected = expected.decode(errors='replace')
+        actual = actual.decode(errors='replace')
+        self.append("Unexpected {} output from test.\n".format(stdout_or_stderr))
+        
+        if expected.rstrip() == actual.rstrip():
+            self.append("Outputs only differ by trailing whitespace.\n")
+            return
         
         if self.use_colors:
-            self.buffer += "Diff (red: expected, green: actual):\n"
-            self.buffer += "------------------------------------------------------------\n"
-            dmp = dmp_module.diff_match_patch()
-            diff = dmp.diff_main(expected, actual)
-            dmp.diff_cleanupSemantic(diff)
+            self.append("Diff (red: expected, green: actual):\n")
+            self.append("------------------------------------------------------------\n")
+            diff = diff_outputs(expected, actual)
             
+            # The escape sequences contain no newline, so the whole diff can
+            # be joined first and have its newlines marked in a single pass.
+            parts = []
             for change in diff:
                 type, content = change
-                if type == -1:
-                    self.color("31")
-                elif type == 1:
-                    self.color("32")
-                self.buffer += content.replace('\n', '↲\n')
-                self.reset_color()
+                parts.append(DIFF_COLORS[type])
+                parts.append(content)
+                parts.append(COLOR_RESET)
+            self.append("".join(parts).replace('\n', '↲\n'))
                 
-            self.buffer += "------------------------------------------------------------\n"
+            self.append("------------------------------------------------------------\n")
         else:
-            self.buffer += "Actual:\n"
-            self.buffer += "------------------------------------------------------------\n"
-            self.buffer += actual
-            self.buffer += "------------------------------------------------------------\n"
-            self.buffer += "Expected:\n"
-            self.buffer += "------------------------------------------------------------\n"
-            self.buffer += expected
-            self.buffer += "------------------------------------------------------------\n"
+            self.append("Actual:\n")
+            self.append("------------------------------------------------------------\n")
+            self.append(actual)
+            self.append("------------------------------------------------------------\n")
+            self.append("Expected:\n")
+            self.append("------------------------------------------------------------\n")
+            self.append(expected)
+            self.append("------------------------------------------------------------\n")
     
-    def output_stdout_mismatch(self, expected: str, actual: str):
+    def output_stdout_mismatch(self, expected: bytes, actual: bytes):
         self._output_stdout_stderr_mismatch("stdout", expected, actual)
     
-    def output_stderr_mismatch(self, expected: str, actual: str):
+    def output_stderr_mismatch(self, expected: bytes, actual: bytes):
         self._output_stdout_stderr_mismatch("stdout", expected, actual)
     
     def output_exitcode_mismatch(self, expected: int, actual: int):
-        self.buffer += "Unexpected exit code from test.\n"
-        self.buffer += "  Actual: {}\n".format(actual)
-        self.buffer += "Expected: {}\n".format(expected)
+        self.append("Unexpected exit code from test.\n")
+        self.append("  Actual: {}\n".format(actual))
+        self.append("Expected: {}\n".format(expected))
     
     def flush(self):
-        if len(self.buffer) > 0:
-            RUNNER_LOCK.acquire()
-            print(self.buffer)
-            RUNNER_LOCK.release()
-            self.buffer = ""
+        if self.buffer is None:
+            return
+        text = self.buffer.getvalue()
+        _release_buffer(self.buffer)
+        self.buffer = None
+        if len(text) > 0:
+            log(text + "\n")
+
+def intern_expected(expected: bytes) -> bytes:
+    # Tests often expect the same output (typically nothing), share a single
+    # object between them so they are stored once.
+    return _EXPECTED_POOL.setdefault(expected, expected)
+
+def _expand_content(content: bytes) -> bytes:
+    # Most expected outputs have no variable at all, those are used as read.
+    if b'$' not in content:
+        return content
+    return expand_variables(content.decode()).encode()
+
+def _set_exitcode(fields: dict, arg: str, content: bytes | None):
+    fields['expected_exitcode'] = int(expand_variables(arg))
+
+def _set_args(fields: dict, arg: str, content: bytes | None):
+    fields['args'] = shlex.split(expand_variables(arg))
+
+def _set_stdout(fields: dict, arg: str, content: bytes | None):
+    fields['expected_stdout'] = intern_expected(_expand_content(content))
+
+def _set_stderr(fields: dict, arg: str, content: bytes | None):
+    fields['expected_stderr'] = intern_expected(_expand_content(content))
+
+def _ignore_cmd(fields: dict, arg: str, content: bytes | None):
+    pass
+
+# Maps a lowercased test file command to the handler filling the Test fields.
+_CMD_DISPATCH = {
+    'exitcode': _set_exitcode,
+    'cmd': _set_args,
+    'command': _set_args,
+    'stdout': _set_stdout,
+    'stderr': _set_stderr,
+}
+
+def parse_test_file(file_content: bytes) -> dict:
+    fields = { 'args': None }
+    get_handler = _CMD_DISPATCH.get
+    
+    # Each command is a line starting with ';', its content spans the
+    # following lines up to (excluding the newline of) the next command.
+    # Only the slices of each command are copied out of file_content and
+    # decoded where needed.
+    if file_content[:1] == b';':
+        position = 0
+    else:
+        position = file_content.find(b'\n;')
+        position = position + 1 if position >= 0 else -1
+    
+    while position >= 0:
+        next_position = file_content.find(b'\n;', position)
+        end = next_position if next_position >= 0 else len(file_content)
+        header_end = file_content.find(b'\n', position, end)
+        if header_end >= 0:
+            header = file_content[position + 1:header_end]
+            content = file_content[header_end + 1:end]
+        else:
+            header = file_content[position + 1:end]
+            content = None
+        position = next_position + 1 if next_position >= 0 else -1
+        
+        words = header.decode().split(None, 1)
+        if not words:
+            continue
+        
+        cmd = words[0].lower()
+        arg = words[1].strip() if len(words) > 1 else ''
+        get_handler(cmd, _ignore_cmd)(fields, arg, content)
+    
+    return fields
 
 class Test:
-    def __init__(self, name: str, path: str, args: List[str], expected_stdout: Union[str,None] = None, expected_stderr: Union[str,None] = None, expected_exitcode: Union[int,None] = None) -> None:
+    def __init__(self, name: str, path: str, args: List[str], expected_stdout: bytes | None = None, expected_stderr: bytes | None = None, expected_exitcode: int | None = None) -> None:
         self.name = name
         self.path = path
         self.args = args
@@ -152,50 +323,31 @@ class Test:
         
     @staticmethod
     def load_from_file(path: str, name: str):
-        args = None
-        expected_exitcode = None
-        expected_stdout = None
-        expected_stderr = None
-        
-        with open(path, 'r') as f:
-            file_content = f.read()
-            for match in CMD_REGEX.finditer(file_content):
-                cmd = match.group(1).lower()
-                arg = match.group(2).strip()
-                content = match.group(4)
-                
-                if cmd == 'exitcode':
-                    expected_exitcode = int(expand_variables(arg))
-                elif cmd == 'cmd' or cmd == 'command':
-                    args = shlex.split(expand_variables(arg))
-                elif cmd == 'stdout':
-                    expected_stdout = expand_variables(content)
-                elif cmd == 'stderr':
-                    expected_stderr = expand_variables(content)
-
-        return Test(name, path, args, expected_stdout, expected_stderr, expected_exitcode)
-
-    def generate_output(self) -> str:
-        result = subprocess.run(self.args, capture_output=True, text=True)
+        with open(path, 'rb') as f:
+            file_content = normalize_newlines(f.read())
+        return Test(name, path, **parse_test_file(file_content))
+
+    async def generate_output(self) -> bytes:
+        result = await execute_command(self.args)
         
-        output = "; CMD {}\n".format(" ".join(self.args))
-        output += "; EXITCODE {}\n".format(result.returncode)
-        output += "; STDOUT\n{}\n".format(result.stdout)
-        output += "; STDERR\n{}".format(result.stderr)
+        output = "; CMD {}\n".format(" ".join(self.args)).encode()
+        output += "; EXITCODE {}\n".format(result.returncode).encode()
+        output += b"; STDOUT\n" + result.stdout + b"\n"
+        output += b"; STDERR\n" + result.stderr
         return output
 
-    def update(self):
-        output = self.generate_output()
-        with open(self.path, 'w') as f:
+    async def update(self):
+        output = await self.generate_output()
+        with open(self.path, 'wb') as f:
             f.write(output)
 
-    def run(self) -> bool:
+    async def run(self) -> bool:
         output = Output()
         output.begin_test_run(self.name)
         
         # Test execution
         start = time.perf_counter_ns()
-        result = subprocess.run(self.args, capture_output=True, text=True)
+        result = await execute_command(self.args)
         end = time.perf_counter_ns()
         execution_time = (end - start)
         
@@ -220,60 +372,77 @@ class Test:
         output.flush()
         return fail
 
-class TestRunnerThread(Thread):
-    def __init__(self, N: int, queue: Queue, updating_mode: bool):
-        super().__init__(name="TestRunner-{}".format(N), daemon=True)
-        self.queue = queue
-        self.updating_mode = updating_mode
-        
-    def run(self) -> None:
-        global ran_tests_count
-        global failed_tests
+async def _update_test(test: Test) -> bool:
+    try:
+        await test.update()
+    except Exception as e:
+        log("ERROR: exception occurred when updating {}\n{}\n".format(test.name, str(e)))
+    return False
+
+async def _run_test(test: Test) -> bool:
+    failed = True
+    try:
+        failed = await test.run()
+    except Exception as e:
+        output = Output()
+        output.end_test_run_exception(test.name, e)
+        output.flush()
+    return failed
+
+async def _run_tests_concurrently(tests, worker, concurrency: int) -> List[Tuple[Test, bool]]:
+    # Every test waits on its process from the event loop, the semaphore
+    # caps how many processes are running at the same time.
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_one(test: Test) -> Tuple[Test, bool]:
+        async with semaphore:
+            return test, await worker(test)
+    
+    return await asyncio.gather(*(run_one(test) for test in tests))
+
+def find_test_files(dir: str):
+    # Iterative os.scandir() walk: directory entries carry their type, so
+    # unlike glob('**') no extra stat() is needed per visited file. Hidden
+    # entries are skipped and unreadable entries ignored as glob did, while
+    # directories already visited (through a symlink loop) are skipped.
+    pending = [dir]
+    visited = set()
+    while pending:
+        current = pending.pop()
+        try:
+            stat = os.stat(current)
+        except OSError:
+            continue
+        if (stat.st_dev, stat.st_ino) in visited:
+            continue
+        visited.add((stat.st_dev, stat.st_ino))
         
-        if self.updating_mode:
-            while True:
-                test = self.queue.get()
-                try:
-                    test.update()
-                except Exception as e:
-                    print("ERROR: exception occurred when updating {}\n{}".format(test.name, str(e)))
-                
-                RUNNER_LOCK.acquire()
-                ran_tests_count += 1
-                RUNNER_LOCK.release()
-                self.queue.task_done()
-        else:
-            while True:
-                test = self.queue.get()
-                
-                failed = True
-                try:
-                    failed = test.run()
-                except Exception as e:
-                    output = Output()
-                    output.end_test_run_exception(test.name, e)
-                    output.flush()
-                
-                RUNNER_LOCK.acquire()
-                ran_tests_count += 1
-                if failed:
-                    failed_tests.append(test)
-                RUNNER_LOCK.release()
-                
-                self.queue.task_done()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        if entry.is_dir():
+                            pending.append(entry.path)
+                        elif entry.name.endswith('.test') and entry.is_file():
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
 
 class TestSuite:
     def __init__(self) -> None:
         self.tests = []
     
     def discover_tests(self, dir):
-        for test_path in glob.glob(dir + "/**/*.test", recursive = True):
-            abs_path = Path(dir, test_path)
-            rel_path = abs_path.relative_to(dir)
+        for test_path in find_test_files(dir):
+            rel_path = Path(os.path.relpath(test_path, dir))
             rel_path = rel_path.with_suffix('')
             name = str(rel_path.as_posix()).replace('/', '.')
             
-            test = Test.load_from_file(abs_path, name)
+            test = Test.load_from_file(test_path, name)
             self.tests.append(test)
             
     def _run_tests(self, tests, threads_count: int, shuffle: bool, updating_mode: bool):        
@@ -284,47 +453,30 @@ class TestSuite:
             
         global brief_mode
         if not brief_mode and not updating_mode:
-            output.color("32")
+            output.color(COLOR_GREEN)
             output.append("[==========]")
             output.reset_color()
             output.append(" Running {} tests".format(len(tests)))
         output.flush()
     
-        global ran_tests_count
-        global failed_tests
+        # Results are only counted here, once every test has completed.
+        ran_tests_count = 0
+        failed_tests = []
+        worker = _update_test if updating_mode else _run_test
     
         if threads_count >= 0:
-            start = time.perf_counter_ns()
+            concurrency = threads_count if threads_count > 0 else os.cpu_count()
+        else:
+            concurrency = 1
         
-            cpu_count = threads_count if threads_count > 0 else os.cpu_count()
+        start = time.perf_counter_ns()
+        results = asyncio.run(_run_tests_concurrently(tests, worker, concurrency))
+        end = time.perf_counter_ns()
         
-            queue = Queue()
-            threads = []
-            for i in range(cpu_count):
-                thread = TestRunnerThread(i, queue, updating_mode)
-                thread.start()
-                threads.append(thread)
-                
-            for test in tests:
-                queue.put(test)
-                
-            queue.join()
-            end = time.perf_counter_ns()
-        else:
-            if updating_mode:
-                start = time.perf_counter_ns()
-                for test in tests:
-                    test.update()
-                    ran_tests_count += 1
-                end = time.perf_counter_ns()
-            else:
-                start = time.perf_counter_ns()
-                for test in tests:
-                    failed = test.run()
-                    ran_tests_count += 1
-                    if failed:
-                        failed_tests.append(test)
-                end = time.perf_counter_ns()
+        for test, failed in results:
+            ran_tests_count += 1
+            if failed:
+                failed_tests.append(test)
             
         if updating_mode:
             text = "1 UPDATED TEST" if ran_tests_count == 1 else "{} UPDATED TESTS".format(ran_tests_count)
@@ -336,13 +488,13 @@ class TestSuite:
         
         passed_tests_count = ran_tests_count - len(failed_tests)
         
-        output.color("32")
+        output.color(COLOR_GREEN)
         output.append("[==========]")
         output.reset_color()
         output.append(" {} tests ran ({}).\n".format(ran_tests_count, time_to_string(execution_time)))
         
         text = "{} tests".format(passed_tests_count) if passed_tests_count > 1 else "{} test".format(passed_tests_count)
-        output.color("32")
+        output.color(COLOR_GREEN)
         output.append("[  PASSED  ]")
         output.reset_color()
         output.append(" {}.".format(text))
@@ -350,13 +502,13 @@ class TestSuite:
         if len(failed_tests) > 0:
             output.append("\n")
             text = "1 test" if len(failed_tests) == 1 else "{} tests".format(len(failed_tests))
-            output.color("31")
+            output.color(COLOR_RED)
             output.append("[  FAILED  ]")
             output.reset_color()
             output.append(" {}, listed below:\n".format(text))
             
             for failed_test in failed_tests:
-                output.color("31")
+                output.color(COLOR_RED)
                 output.append("[  FAILED  ]")
                 output.reset_color()
                 output.append(" ")
@@ -368,15 +520,17 @@ class TestSuite:
             
         output.flush()
             
-    def run_tests(self, regex_filter: Union[None, str, re.Pattern], threads_count: int = 0, shuffle: bool = False, updating_mode: bool = False):
+    def run_tests(self, regex_filter: None | str | re.Pattern, threads_count: int = 0, shuffle: bool = False, updating_mode: bool = False):
         tests = self.tests
         if regex_filter is not None:
-            tests = list(filter(lambda test: re.fullmatch(regex_filter, test.name) is not None, self.tests))
+            pattern = re.compile(regex_filter)
+            tests = list(filter(lambda test: pattern.fullmatch(test.name) is not None, self.tests))
         self._run_tests(tests, threads_count=threads_count, shuffle=shuffle, updating_mode=updating_mode)
         
-    def list_tests(self, regex_filter: Union[None, str, re.Pattern]):
+    def list_tests(self, regex_filter: None | str | re.Pattern):
         if regex_filter is not None:
-            for test in filter(lambda test: re.fullmatch(regex_filter, test.name) is not None, self.tests):
+            pattern = re.compile(regex_filter)
+            for test in filter(lambda test: pattern.fullmatch(test.name) is not None, self.tests):
                 print(test.name)
         else:
             for test in self.tests:
@@ -389,7 +543,7 @@ if __name__ == '__main__':
     parser.add_argument('dirs', nargs='*', default=['.'], help="all directories too* lookup for tests")
     parser.add_argument('--list', action='store_true', help="list the names of all tests instead of running them")
     parser.add_argument('--filter', help="run only the tests whose name matches the given regular expression")
-    parser.add_argument('--threads', type=int, default=0, help="maximum number of threads to use for running tests, -1 means none, 0 means all availables cpus (default: 0)")
+    parser.add_argument('--threads', type=int, default=0, help="maximum number of tests to run concurrently, -1 means one at a time, 0 means all availables cpus (default: 0)")
     parser.add_argument('--shuffle', action='store_true', help="randomize tests' orders")
     parser.add_argument('--brief', action='store_true', help="only print test failures")
     parser.add_argument('--color', choices=['yes', 'no', 'auto'], default='auto', help="enable/disable colored output (default: auto)")